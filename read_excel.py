@@ -1,19 +1,33 @@
 ﻿from __future__ import annotations
 
+import itertools
 import json
 import re
+import sys
 import unicodedata
 from collections import Counter
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
+import ahocorasick
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 BASE_DIR = Path(__file__).resolve().parent
 INPUT_XLSX = BASE_DIR / "data" / "Final List-23.09.2025.xlsx"
+CACHE_PARQUET = BASE_DIR / "data" / "cache.parquet"
 OUTPUT_JSON = BASE_DIR / "data.json"
 
 SCORE_MAP: Dict[str, int] = {"high": 3, "medium": 2, "low": 1}
+NON_ALPHA_RE = re.compile(r"[^a-z ]+")
+WHITESPACE_RE = re.compile(r"\s+")
+SLUG_RE = re.compile(r"[^a-z0-9]+")
+PART_SPLIT_RE = re.compile(r",|/|;|\band\b", re.IGNORECASE)
 CATEGORY_KEYWORDS = [
     ("Beverages & Processed Foods", [
         "juice",
@@ -65,6 +79,18 @@ CATEGORY_KEYWORDS = [
     ]),
 ]
 
+# Keywords shared across categories ("tea" sits in both Beverages and
+# Medicinal) resolve to the earliest-listed category via setdefault.
+KEYWORD_TO_CATEGORY: Dict[str, Tuple[int, str]] = {}
+for _rank, (_label, _keywords) in enumerate(CATEGORY_KEYWORDS):
+    for _keyword in _keywords:
+        KEYWORD_TO_CATEGORY.setdefault(_keyword, (_rank, _label))
+
+PRODUCT_AUTOMATON = ahocorasick.Automaton()
+for _keyword, _category in KEYWORD_TO_CATEGORY.items():
+    PRODUCT_AUTOMATON.add_word(_keyword, _category)
+PRODUCT_AUTOMATON.make_automaton()
+
 PART_LOOKUP = {
     "bark": "Bark",
     "flower": "Flower",
@@ -94,6 +120,14 @@ PART_LOOKUP = {
     "wood": "Wood & Timber",
     "timber": "Wood & Timber",
 }
+PART_LOOKUP = {key: sys.intern(value) for key, value in PART_LOOKUP.items()}
+
+# Tokens are space-padded so the automaton only matches whole words within
+# the normalized string ("seed" must not fire inside "seedling").
+PART_AUTOMATON = ahocorasick.Automaton()
+for _token, _part in PART_LOOKUP.items():
+    PART_AUTOMATON.add_word(f" {_token} ", _part)
+PART_AUTOMATON.make_automaton()
 
 PART_ORDER = [
     "Bark",
@@ -114,25 +148,44 @@ PART_ORDER = [
     "Whole Thallus",
 ]
 
+PART_RANK = {part: rank for rank, part in enumerate(PART_ORDER)}
+PART_RANK_FALLBACK = len(PART_ORDER)
+
+LINKAGE_NOTES = {
+    "Backward": "Strengthen cultivation, nurseries, and aggregation systems to stabilise supply.",
+    "Forward": "Invest in processing, packaging, and market development to capture premiums.",
+    "Integrated": "Coordinate both production and market-side interventions for balanced growth.",
+}
+
 
+@lru_cache(maxsize=None)
 def to_ascii(text: str) -> str:
+    if text.isascii():
+        return " ".join(text.split())
     normalized = unicodedata.normalize("NFKD", text)
     ascii_text = normalized.encode("ascii", "ignore").decode("ascii")
     return " ".join(ascii_text.strip().split())
 
 
+@lru_cache(maxsize=None)
 def normalize_token(token: str) -> str:
     ascii_token = to_ascii(token).lower()
     ascii_token = ascii_token.replace("-", " ")
-    ascii_token = re.sub(r"[^a-z ]+", " ", ascii_token)
-    return re.sub(r"\s+", " ", ascii_token).strip()
+    ascii_token = NON_ALPHA_RE.sub(" ", ascii_token)
+    return WHITESPACE_RE.sub(" ", ascii_token).strip()
 
 
+@lru_cache(maxsize=None)
 def slugify(value: str) -> str:
-    slug = re.sub(r"[^a-z0-9]+", "-", value.lower())
+    slug = SLUG_RE.sub("-", value.lower())
     return slug.strip("-")
 
 
+@lru_cache(maxsize=None)
+def title_case(value: str) -> str:
+    return sys.intern(value.title())
+
+
 def split_by_comma(raw: str) -> List[str]:
     if not raw:
         return []
@@ -146,21 +199,20 @@ def parse_products(raw: str) -> List[str]:
 
 def parse_districts(raw: str) -> List[str]:
     districts = split_by_comma(raw)
-    return sorted({district.title() for district in districts if district})
+    return sorted({title_case(district) for district in districts if district})
 
 
 def parse_parts(raw: str) -> List[str]:
     if not raw:
         return []
-    tokens = re.split(r",|/|;|\band\b", raw, flags=re.IGNORECASE)
-    canonical = set()
-    for token in tokens:
-        cleaned = normalize_token(token)
-        if not cleaned:
-            continue
-        canonical.add(PART_LOOKUP.get(cleaned, cleaned.title()))
-    filtered = [part for part in canonical if part]
-    return sorted(filtered, key=lambda part: (PART_ORDER.index(part) if part in PART_ORDER else len(PART_ORDER), part))
+    cleaned = normalize_token(raw)
+    canonical = {part for _, part in PART_AUTOMATON.iter(f" {cleaned} ")}
+    if not canonical:
+        for token in PART_SPLIT_RE.split(raw):
+            token_cleaned = normalize_token(token)
+            if token_cleaned:
+                canonical.add(PART_LOOKUP.get(token_cleaned) or title_case(token_cleaned))
+    return sorted(canonical, key=lambda part: (PART_RANK.get(part, PART_RANK_FALLBACK), part))
 
 
 def determine_linkage(volume: str, commercial: str) -> str:
@@ -175,19 +227,18 @@ def determine_linkage(volume: str, commercial: str) -> str:
     return "Integrated"
 
 
+@lru_cache(maxsize=None)
 def determine_species_type(category: str) -> str:
-    category_lower = category.lower()
-    if "agro" in category_lower:
+    if "agro" in category.lower():
         return "Agro-commodity"
     return "NTFP"
 
 
-def determine_product_focus(products: List[str]) -> str:
-    joined = " ".join(product.lower() for product in products)
-    for label, keywords in CATEGORY_KEYWORDS:
-        if any(keyword in joined for keyword in keywords):
-            return label
-    return "Other Value Chain"
+def determine_product_focus(joined: str) -> str:
+    match = min((value for _, value in PRODUCT_AUTOMATON.iter(joined)), default=None)
+    if match is None:
+        return "Other Value Chain"
+    return match[1]
 
 
 def human_join(items: List[str]) -> str:
@@ -213,90 +264,137 @@ def build_strength(name: str, species_type: str, volume: str, commercial: str, d
 
 
 def build_justification(linkage: str, products: List[str], parts: List[str]) -> str:
-    linkage_note = {
-        "Backward": "Strengthen cultivation, nurseries, and aggregation systems to stabilise supply.",
-        "Forward": "Invest in processing, packaging, and market development to capture premiums.",
-        "Integrated": "Coordinate both production and market-side interventions for balanced growth.",
-    }[linkage]
-    return linkage_note
+    return LINKAGE_NOTES[linkage]
 
 
-def clean_cell(value) -> str:
-    if value is None:
-        return ""
-    if isinstance(value, float) and pd.isna(value):
-        return ""
-    return to_ascii(str(value))
+def clean_column(series: pd.Series) -> pd.Series:
+    return series.map(to_ascii)
+
+
+def read_workbook() -> pd.DataFrame:
+    if CACHE_PARQUET.exists() and CACHE_PARQUET.stat().st_mtime >= INPUT_XLSX.stat().st_mtime:
+        return pd.read_parquet(CACHE_PARQUET)
+    df = pd.read_excel(INPUT_XLSX, dtype=str, keep_default_na=False, na_filter=False, engine="calamine")
+    df.to_parquet(CACHE_PARQUET)
+    return df
 
 
 def load_rows() -> List[Dict[str, str]]:
     if not INPUT_XLSX.exists():
         raise FileNotFoundError(f"Excel file not found at {INPUT_XLSX}")
-    df = pd.read_excel(INPUT_XLSX)
-    records: List[Dict[str, str]] = []
-    for _, row in df.iterrows():
-        cleaned = {column: clean_cell(row[column]) for column in df.columns}
-        records.append(cleaned)
-    return records
+    df = read_workbook()
+    for column in df.columns:
+        df[column] = clean_column(df[column])
+    return df.to_dict(orient="records")
 
 
 def transform() -> Dict[str, object]:
     source_rows = load_rows()
-    species: List[Dict[str, object]] = []
 
-    district_counter: Counter[str] = Counter()
-    linkage_counter: Counter[str] = Counter()
-    species_type_counter: Counter[str] = Counter()
-    habitat_counter: Counter[str] = Counter()
-    parts_counter: Counter[str] = Counter()
+    names: List[str] = []
+    botanicals: List[str] = []
+    images: List[str] = []
+    species_types: List[str] = []
+    habitats: List[str] = []
+    conservations: List[str] = []
+    district_lists: List[List[str]] = []
+    part_lists: List[List[str]] = []
+    product_lists: List[List[str]] = []
+    product_focuses: List[str] = []
+    linkages: List[str] = []
+    volumes: List[str] = []
+    commercials: List[str] = []
+    strengths: List[str] = []
+    justifications: List[str] = []
 
     for row in source_rows:
         name = row.get("Common Name") or row.get("Scientific Name") or "Unnamed Commodity"
         botanical = row.get("Scientific Name") or ""
         category = row.get("CATEGORY") or "NTFP"
         species_type = determine_species_type(category)
-        habitat = row.get("HABITAT") or ""
-        conservation = row.get("Conservation Status") or ""
         volume = row.get("Volume") or "Medium"
         commercial = row.get("Commercial Value") or "Medium"
         districts = parse_districts(row.get("Districts") or "")
         products = parse_products(row.get("Products") or "")
-        parts_used = parse_parts(row.get("Plant Parts Used") or "")
         linkage = determine_linkage(volume, commercial)
-        product_focus = determine_product_focus(products)
-        strength = build_strength(name, species_type, volume, commercial, districts)
-        justification = build_justification(linkage, products, parts_used)
+        joined_products = " ".join(product.lower() for product in products)
+        parts_used = parse_parts(row.get("Plant Parts Used") or "")
         slug = slugify(name or botanical or "species")
-        image_path = f"images/{slug}.jpg"
-
-        for district in districts:
-            district_counter[district] += 1
-        linkage_counter[linkage] += 1
-        species_type_counter[species_type] += 1
-        if habitat:
-            habitat_counter[habitat] += 1
-        for part in parts_used:
-            parts_counter[part] += 1
-
-        species.append(
-            {
-                "name": name,
-                "botanical": botanical,
-                "image": image_path,
-                "speciesType": species_type,
-                "habitat": habitat,
-                "conservation": conservation,
-                "districts": districts,
-                "partsUsed": parts_used,
-                "products": products,
-                "productFocus": product_focus,
-                "linkage": linkage,
-                "volume": volume,
-                "commercialValue": commercial,
-                "strength": strength,
-                "justification": justification,
-            }
+
+        names.append(name)
+        botanicals.append(botanical)
+        images.append(f"images/{slug}.jpg")
+        species_types.append(species_type)
+        habitats.append(sys.intern(row.get("HABITAT") or ""))
+        conservations.append(row.get("Conservation Status") or "")
+        district_lists.append(districts)
+        part_lists.append(parts_used)
+        product_lists.append(products)
+        product_focuses.append(determine_product_focus(joined_products))
+        linkages.append(linkage)
+        volumes.append(volume)
+        commercials.append(commercial)
+        strengths.append(build_strength(name, species_type, volume, commercial, districts))
+        justifications.append(build_justification(linkage, products, parts_used))
+
+    species: List[Dict[str, object]] = [
+        {
+            "name": name,
+            "botanical": botanical,
+            "image": image,
+            "speciesType": species_type,
+            "habitat": habitat,
+            "conservation": conservation,
+            "districts": districts,
+            "partsUsed": parts_used,
+            "products": products,
+            "productFocus": product_focus,
+            "linkage": linkage,
+            "volume": volume,
+            "commercialValue": commercial,
+            "strength": strength,
+            "justification": justification,
+        }
+        for (
+            name,
+            botanical,
+            image,
+            species_type,
+            habitat,
+            conservation,
+            districts,
+            parts_used,
+            products,
+            product_focus,
+            linkage,
+            volume,
+            commercial,
+            strength,
+            justification,
+        ) in zip(
+            names,
+            botanicals,
+            images,
+            species_types,
+            habitats,
+            conservations,
+            district_lists,
+            part_lists,
+            product_lists,
+            product_focuses,
+            linkages,
+            volumes,
+            commercials,
+            strengths,
+            justifications,
         )
+    ]
+
+    district_counter = Counter(itertools.chain.from_iterable(district_lists))
+    linkage_counter = Counter(linkages)
+    species_type_counter = Counter(species_types)
+    habitat_counter = Counter(habitat for habitat in habitats if habitat)
+    parts_counter = Counter(itertools.chain.from_iterable(part_lists))
 
     top_districts = ", ".join(f"{district} ({count})" for district, count in district_counter.most_common(5))
     top_parts = ", ".join(f"{part.lower()} ({count})" for part, count in parts_counter.most_common(4))
@@ -346,8 +444,11 @@ def transform() -> Dict[str, object]:
 
 def main() -> None:
     dataset = transform()
-    with OUTPUT_JSON.open("w", encoding="utf-8") as handle:
-        json.dump(dataset, handle, indent=2)
+    if orjson is not None:
+        OUTPUT_JSON.write_bytes(orjson.dumps(dataset, option=orjson.OPT_INDENT_2))
+    else:
+        with OUTPUT_JSON.open("w", encoding="utf-8") as handle:
+            json.dump(dataset, handle, indent=2)
     print(f"Wrote {len(dataset['species'])} species records to {OUTPUT_JSON}")
 
 